@@ -15,8 +15,6 @@ Based on getMOSPatch v2 from Maris Elsins
 
 Requires:
     - requests
-    - beautifulsoup4
-    - html5lib
 
 Version: $Id$
 """
@@ -26,51 +24,166 @@ import json
 import logging
 import csv
 import getpass
-import math
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from requests import RequestException
+# orjson is optional, it is only used to parse the config file faster
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
-from oraclepatchdownloader import (
-    OraclePatchDownloader,
-    OraclePatchType,
-    OracleSupportError,
-)
+# requests and oraclepatchdownloader are imported where they are used, so
+# --help does not pay for loading them.
 
 _AHF_PATCH_NUMBER = "30166242"
 _OPATCH_PATCH_NUMBER = "6880880"
 
 _CONFIG_FILE = "config.json"
+_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), _CONFIG_FILE
+)
+
+# Expected type of every mandatory key of the config file
+_CONFIG_SCHEMA = {
+    "username": str,
+    "password": str,
+    "target_dir": str,
+    "platforms": list,
+    "ignored_releases": list,
+    "ignored_description_words": list,
+}
 
 _LOGGER_FORMAT = r"%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 _LOGGER_DATE_FMT = r"%Y-%m-%d %H:%M:%S"
 
+# Default maximum number of files downloaded at the same time. Can be
+# overridden with the OQPD_PARALLEL environment variable or --parallel.
+_MAX_PARALLEL_DOWNLOADS = 8
+_PARALLEL_ENV_VAR = "OQPD_PARALLEL"
+
+# Minimum interval, in seconds, between two progress lines of the same file
+_PROGRESS_MIN_INTERVAL = 0.1
 
-def print_progress_function(file_name, file_size, total_downloaded):
+
+class ProgressPrinter:
     """Prints a progress indicator for the downloads
 
-    Args:
-        file_name (str): Name of the file being downloaded
-        file_size (int): File's total size in bytes
-        total_downloaded (int): Bytes already downloaded
+    Progress lines are only emitted when the percentage of a file changes,
+    at most once every min_interval seconds, plus a final line when the file
+    is complete. It is safe to share an instance among download threads.
     """
-    formatted_file_size_mb = f"{(file_size / 1024 / 1024):.0f}"
-    if file_size:
-        pct = math.floor(total_downloaded * 100 / file_size)
-    else:
-        pct = 0
-
-    print(
-        f"\rFile Name: {file_name.ljust(40)} "
-        f"File Size (MB): {formatted_file_size_mb.ljust(6)} "
-        f"Downloaded (%): {str(pct).ljust(3)}",
-        end="",
-        flush=True,
-    )
 
-    if pct == 100:
-        print("", flush=True)
+    def __init__(self, min_interval=_PROGRESS_MIN_INTERVAL):
+        """Creates an instance of ProgressPrinter
+
+        Args:
+            min_interval (float): Minimum interval in seconds between two
+                progress lines of the same file. Defaults to 0.1.
+        """
+        self._min_interval = min_interval
+        self._last_emit = {}
+        self._line_prefixes = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, file_name, file_size, total_downloaded):
+        """Prints the progress of a download
+
+        Args:
+            file_name (str): Name of the file being downloaded
+            file_size (int): File's total size in bytes
+            total_downloaded (int): Bytes already downloaded
+        """
+        pct = (total_downloaded * 100) // file_size if file_size else 0
+
+        now = time.monotonic()
+        with self._lock:
+            last_pct, last_time = self._last_emit.get(file_name, (None, 0.0))
+            if pct != 100 and (
+                pct == last_pct or now - last_time < self._min_interval
+            ):
+                return
+
+            line_prefix = self._line_prefixes.get(file_name)
+            if line_prefix is None:
+                formatted_file_size_mb = f"{(file_size / 1024 / 1024):.0f}"
+                line_prefix = (
+                    f"\rFile Name: {file_name.ljust(40)} "
+                    f"File Size (MB): {formatted_file_size_mb.ljust(6)} "
+                    "Downloaded (%): "
+                ).encode()
+                self._line_prefixes[file_name] = line_prefix
+
+            line = line_prefix + str(pct).ljust(3).encode()
+            if pct == 100:
+                self._last_emit.pop(file_name, None)
+                self._line_prefixes.pop(file_name, None)
+                line += b"\n"
+            else:
+                self._last_emit[file_name] = (pct, now)
+
+            self._write(line)
+
+    @staticmethod
+    def _write(line):
+        """Writes an encoded progress line to stdout and flushes it
+
+        Args:
+            line (bytes): The progress line
+        """
+        stdout = sys.stdout
+        # Text already written through print() must come out first
+        stdout.flush()
+        stdout_buffer = getattr(stdout, "buffer", None)
+        if stdout_buffer is None:
+            stdout.write(line.decode())
+            stdout.flush()
+        else:
+            stdout_buffer.write(line)
+            stdout_buffer.flush()
+
+
+print_progress_function = ProgressPrinter()
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """Logging formatter that formats the timestamp once per second
+
+    The date format has a resolution of one second, so every record logged
+    within the same second reuses the same formatted timestamp.
+    """
+
+    def __init__(self, fmt=None, datefmt=None):
+        """Creates an instance of CachedTimeFormatter
+
+        Args:
+            fmt (str): Format of the log records
+            datefmt (str): strftime format of the timestamp
+        """
+        super().__init__(fmt=fmt, datefmt=datefmt)
+        self._last_second = None
+        self._last_formatted_time = ""
+
+    def formatTime(self, record, datefmt=None):
+        """Returns the formatted creation time of a record
+
+        Args:
+            record (logging.LogRecord): The record being formatted
+            datefmt (str): strftime format of the timestamp
+
+        Returns:
+            str: The formatted timestamp
+        """
+        record_second = int(record.created)
+        if record_second != self._last_second:
+            self._last_formatted_time = time.strftime(
+                datefmt or _LOGGER_DATE_FMT, self.converter(record_second)
+            )
+            self._last_second = record_second
+        return self._last_formatted_time
 
 
 def print_platforms(patch_dler):
@@ -90,12 +203,45 @@ def print_platforms(patch_dler):
             print(f"{plat_code:6} - {plat_value}")
 
 
-def handle_file(filehandle, patch_dler, dry_run_mode=True):
+def _download_one(patch_dler, patchinfo, platform, dry_run_mode):
+    """Downloads the files of a single patch listed in the CSV file
+
+    Args:
+        patch_dler (OraclePatchDownloader): Oracle Patch downloader object
+        patchinfo (list): The CSV line describing the patch
+        platform (int): Numeric platform code
+        dry_run_mode (bool): Whether dry run has been passed.
+
+    Returns:
+        int: Bytes downloaded.
+    """
+    patchsz = patch_dler.download_patch_files(
+        patchinfo[0],
+        str(platform),
+        patchinfo[3],
+        print_progress_function,
+        dry_run_mode,
+    )
+    if patchsz == 0:
+        logging.warning('No data downloaded for patch %s platform %s.',
+            patchinfo[0],
+            patchinfo[4])
+    return patchsz
+
+
+def handle_file(
+    filehandle,
+    patch_dler,
+    dry_run_mode=True,
+    max_workers=_MAX_PARALLEL_DOWNLOADS,
+):
     """Download the patches listed in the passed file
     Arguments:
         filehandle (FILE): The file containing the patch list
         patch_dler: The patch downloader object.
         dry_run_mode (bool): Whether dry run has been passed.
+        max_workers (int): Maximum number of patches downloaded at the same
+            time. A value of 1 downloads the patches serially.
 
         The file contains a list of patches to download which will end
         up in the patchinfo array as:
@@ -105,58 +251,107 @@ def handle_file(filehandle, patch_dler, dry_run_mode=True):
         3 - Group (Download subdirectory)
         4 - Platform. Needs to be as per the output of -l
     """
-    platforms = patch_dler.list_platforms()
-    bytes_downloaded = 0
+    platform_codes = patch_dler.platform_codes_by_name()
+    rows = []
+    queued_downloads = set()
 
-    with filehandle as patch_list_handle:
-        patchreader = csv.reader(
-            filter(lambda row: row[0] != "#", patch_list_handle)
+    # The whole file is read up front, the rows are then handed out to the
+    # download threads, which cannot share the file iterator.
+    try:
+        patch_lines = list(
+            csv.reader(
+                line
+                for line in filehandle
+                if line and not line.startswith(("#", "\n", "\r\n"))
+            )
         )
-        for patchinfo in patchreader:
-            if len(patchinfo) != 5:
-                logging.warning(
-                    "Skipping as line doesn't have 5 columns: %s",
-                    ",".join(map(str, patchinfo)),
-                )
-                continue
-            logging.debug(
-                "Downloading Patch %s for platform %s",
-                patchinfo[0],
-                patchinfo[4],
+    finally:
+        filehandle.close()
+
+    for patchinfo in patch_lines:
+        try:
+            patch_number, _, _, _, platform_name = patchinfo
+        except ValueError:
+            logging.warning(
+                "Skipping as line has %d columns instead of 5: %s",
+                len(patchinfo),
+                patchinfo,
             )
-            # Is the platform a number, if not convert it.
-            if patchinfo[4].isnumeric():
-                platform = int(patchinfo[4])
-            # If platform is blank, use generic platform (Hard coded)
-            elif not patchinfo[4].strip():
-                platform = 2000
-            else:
-                if patchinfo[4] in platforms.values():
-                    platform = list(platforms.keys())[
-                        list(platforms.values()).index(patchinfo[4])
-                    ]
-                else:
-                    logging.warning(
-                        "Platform (%s) for patch %s} is missing."
-                        " Skipping this line.",
-                        patchinfo[4],
-                        patchinfo[0],
-                    )
-                    continue
-
-            patchsz = patch_dler.download_patch_files(
-                patchinfo[0],
-                str(platform),
-                patchinfo[3],
-                print_progress_function,
-                dry_run_mode,
+            continue
+        logging.debug(
+            "Downloading Patch %s for platform %s",
+            patch_number,
+            platform_name,
+        )
+        # Is the platform a number, if not convert it.
+        if platform_name.isnumeric():
+            platform = int(platform_name)
+        # If platform is blank, use generic platform (Hard coded)
+        elif not platform_name.strip():
+            platform = 2000
+        elif platform_name in platform_codes:
+            platform = platform_codes[platform_name]
+        else:
+            logging.warning(
+                "Platform (%s) for patch %s is missing."
+                " Skipping this line.",
+                platform_name,
+                patch_number,
+            )
+            continue
+
+        # A repeated line would download to the same files at the same time
+        # and corrupt them. Codes from platform_codes are strings, numeric
+        # columns are ints, so both are compared as strings.
+        download_key = (patch_number, str(platform), patchinfo[3])
+        if download_key in queued_downloads:
+            logging.debug(
+                "Skipping repeated line for patch %s platform %s",
+                patch_number,
+                platform_name,
             )
-            if patchsz == 0:
-                logging.warning('No data downloaded for patch %s platform %s.',
-                    patchinfo[0],
-                    patchinfo[4])
-            bytes_downloaded += patchsz
-    return bytes_downloaded
+            continue
+        queued_downloads.add(download_key)
+
+        rows.append((patchinfo, platform))
+
+    if max_workers <= 1:
+        return sum(
+            _download_one(patch_dler, patchinfo, platform, dry_run_mode)
+            for patchinfo, platform in rows
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        patch_sizes = executor.map(
+            lambda row: _download_one(
+                patch_dler, row[0], row[1], dry_run_mode
+            ),
+            rows,
+        )
+        return sum(patch_sizes)
+
+
+def check_config(config_json):
+    """Checks that the config file has every mandatory key with the
+    expected type, so a bad config fails before connecting to Oracle Support.
+
+    Args:
+        config_json: The parsed config file
+
+    Returns:
+        str: A description of the first problem found, None if the config
+            is valid.
+    """
+    if not isinstance(config_json, dict):
+        return "the config must be a JSON object"
+
+    for key, expected_type in _CONFIG_SCHEMA.items():
+        if key not in config_json:
+            return f'missing key "{key}"'
+        if not isinstance(config_json[key], expected_type):
+            return f'key "{key}" must be of type {expected_type.__name__}'
+
+    return None
 
 
 def get_ora_pass(argpass, jsonpass):
@@ -270,8 +465,22 @@ def read_cli_args():
         help="Forcefully download a new em_catalog.zip",
         dest="refresh_catalog",
     )
+    cli_args_parser.add_argument(
+        "-j",
+        "--parallel",
+        type=int,
+        default=os.getenv(_PARALLEL_ENV_VAR, str(_MAX_PARALLEL_DOWNLOADS)),
+        required=False,
+        help="Maximum number of files downloaded at the same time, across "
+        "all patches. Files of 256 MB or more are fetched over 4 "
+        "connections each. "
+        f"Defaults to ${_PARALLEL_ENV_VAR} or {_MAX_PARALLEL_DOWNLOADS}.",
+        dest="parallel_downloads",
+    )
 
     cli_args = cli_args_parser.parse_args()
+    if cli_args.parallel_downloads < 1:
+        cli_args_parser.error("argument -j/--parallel: must be at least 1")
     return cli_args
 
 
@@ -284,27 +493,35 @@ def main(argv=None):
     total_downloaded_bytes = 0
     cli_args = read_cli_args()
 
+    # pylint: disable=import-outside-toplevel
+    from requests import RequestException
+
+    from oraclepatchdownloader import (
+        OraclePatchDownloader,
+        OraclePatchType,
+        OracleSupportError,
+    )
+
     logging_level = logging.DEBUG if cli_args.debug_mode else logging.INFO
 
-    logging.basicConfig(
-        format=_LOGGER_FORMAT,
-        level=logging_level,
-        datefmt=_LOGGER_DATE_FMT,
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(
+        CachedTimeFormatter(fmt=_LOGGER_FORMAT, datefmt=_LOGGER_DATE_FMT)
     )
+    logging.basicConfig(level=logging_level, handlers=[log_handler])
 
     config_json = []
     try:
-        with open(
-            os.path.join(sys.path[0], _CONFIG_FILE), encoding="utf-8"
-        ) as config_file:
-            config_json = json.load(config_file)
+        with open(_CONFIG_PATH, encoding="utf-8") as config_file:
+            config_json = json_loads(config_file.read())
     except (FileNotFoundError, json.decoder.JSONDecodeError) as excep:
         error_str = f"Invalid config file - {str(excep)}"
         logging.fatal(error_str)
         return 1
 
-    if config_json is None:
-        logging.fatal("Invalid config file")
+    config_error = check_config(config_json)
+    if config_error:
+        logging.fatal("Invalid config file - %s", config_error)
         return 1
 
     patch_dler = OraclePatchDownloader(
@@ -316,6 +533,7 @@ def main(argv=None):
         ),
         wanted_platforms=config_json["platforms"],
         target_dir=config_json["target_dir"],
+        max_parallel_downloads=cli_args.parallel_downloads,
     )
 
     if cli_args.refresh_catalog:
@@ -346,30 +564,43 @@ def main(argv=None):
             cli_args.patch_list_file,
             patch_dler,
             cli_args.dry_run_mode,
+            cli_args.parallel_downloads,
         )
 
     else:
-        total_downloaded_bytes += patch_dler.download_oracle_patch(
-            patch_number=_AHF_PATCH_NUMBER,
-            patch_type=OraclePatchType.AHF,
-            progress_function=print_progress_function,
-            dry_run_mode=cli_args.dry_run_mode,
-        )
-
-        total_downloaded_bytes += patch_dler.download_oracle_patch(
-            patch_number=_OPATCH_PATCH_NUMBER,
-            patch_type=OraclePatchType.OPATCH,
-            progress_function=print_progress_function,
-            dry_run_mode=cli_args.dry_run_mode,
-        )
-
-        total_downloaded_bytes += patch_dler.download_oracle_quarter_patches(
-            patch_type=OraclePatchType.QUARTER,
-            ignored_releases=config_json["ignored_releases"],
-            ignored_description_words=config_json["ignored_description_words"],
-            progress_function=print_progress_function,
-            dry_run_mode=cli_args.dry_run_mode,
-        )
+        # The three downloads are independent, so they run at the same time.
+        # patch_dler still limits the files in progress to -j in total.
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            download_futures = [
+                executor.submit(
+                    patch_dler.download_oracle_patch,
+                    patch_number=_AHF_PATCH_NUMBER,
+                    patch_type=OraclePatchType.AHF,
+                    progress_function=print_progress_function,
+                    dry_run_mode=cli_args.dry_run_mode,
+                ),
+                executor.submit(
+                    patch_dler.download_oracle_patch,
+                    patch_number=_OPATCH_PATCH_NUMBER,
+                    patch_type=OraclePatchType.OPATCH,
+                    progress_function=print_progress_function,
+                    dry_run_mode=cli_args.dry_run_mode,
+                ),
+                executor.submit(
+                    patch_dler.download_oracle_quarter_patches,
+                    patch_type=OraclePatchType.QUARTER,
+                    ignored_releases=config_json["ignored_releases"],
+                    ignored_description_words=config_json[
+                        "ignored_description_words"
+                    ],
+                    progress_function=print_progress_function,
+                    dry_run_mode=cli_args.dry_run_mode,
+                ),
+            ]
+            total_downloaded_bytes += sum(
+                download_future.result()
+                for download_future in download_futures
+            )
 
     # Looks like original idea was to indicate file size rather than
     # download amount.
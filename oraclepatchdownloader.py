@@ -4,8 +4,7 @@ Author: Lucas Pimentel Lellis
 
 Requires:
     - requests
-    - beautifulsoup4
-    - html5lib
+    - lxml (optional, parses the catalog faster)
 
 Based on getMOSPatch v2 from Maris Elsins
 (https://github.com/MarisElsins/getMOSPatch).
@@ -15,34 +14,151 @@ Version: $Id$
 """
 
 import collections
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 import datetime
 from enum import Enum
+import functools
 import hashlib
+import html
+import io
+import json
 import logging
 import os
 import pathlib
+import queue
 import re
 import shutil
+import stat
+import threading
 import time
-import xml.etree
 import zipfile
 from http import HTTPStatus
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+# lxml provides the same API as the standard library, only faster
+try:
+    from lxml import etree as ElementTree
+
+    _USING_LXML = True
+    # Oracle's catalog does not use entities. Not expanding them keeps lxml
+    # as safe as the standard library against entity expansion attacks.
+    _XML_PARSER_OPTIONS = {"resolve_entities": False}
+except ImportError:
+    from xml.etree import ElementTree
+
+    _USING_LXML = False
+    _XML_PARSER_OPTIONS = {}
 
 # Mandatory as it's the only way to escape Oracle's JavaScript check
 _HEADERS = {"User-Agent": "Wget/1.20.3"}
 
-# Mandatory as sometimes Oracle's HTML is broken
-_DEFAULT_HTML_PARSER = "html5lib"
+# Patch files are already compressed. Asking for them unencoded keeps
+# Content-Length equal to the file size and byte ranges valid, and lets
+# urllib3 skip its decoders.
+_DOWNLOAD_HEADERS = {"Accept-Encoding": "identity"}
+
+# Links to .zip files in the search results. The page is scanned instead of
+# parsed, as sometimes Oracle's HTML is broken.
+_ZIP_HREF_REGEX = re.compile(
+    rb"""<a\s(?:[^>]*?\s)?href\s*=\s*["']?([^"'\s>]*\.zip[^"'\s>]*)""",
+    re.IGNORECASE,
+)
+_URL_PREFIX_REGEX = re.compile(
+    r"https://[^.]+\.oracle\.com/([A-Za-z0-9-_]+/){0,}"
+)
+_ARU_REGEX = re.compile("[?]aru=([0-9]+)")
+_PATCH_FILE_REGEX = re.compile("[?&]patch_file=([^&]+)")
+_SHA256_REGEX = re.compile(r"\b[A-Fa-f0-9]{64}\b")
+_DIRECTORY_NAME_REGEX = re.compile("[^a-zA-Z0-9_.-]+")
+
+# Sections of patch_recommendations.xml listing the recommended patches of
+# each release
+_RECOMMENDATIONS_SECTIONS = (
+    "standalone_recommendations",
+    "components_recommendations",
+)
 
 _CHUNK_SIZE = 2097152  # 2 MB
 
+# Each chunk is filled by smaller reads from the connection, as urllib3
+# allocates a temporary bytes object of the requested size on every read
+_SOCKET_READ_SIZE = 65536  # 64 KB
+
 _REQUEST_TIMEOUT = 30  # seconds
 
+# Logon redirects are followed manually, up to this many hops
+_MAX_LOGON_REDIRECTS = 10
+_REDIRECT_STATUS_CODES = frozenset(
+    (
+        HTTPStatus.MOVED_PERMANENTLY,
+        HTTPStatus.FOUND,
+        HTTPStatus.TEMPORARY_REDIRECT,
+        HTTPStatus.PERMANENT_REDIRECT,
+    )
+)
+
 _DESC_FILE_NAME = "description.txt"
 
+_MAX_PARALLEL_DOWNLOADS = 8
+
+# Kept-alive connections per host in the default HTTP session
+_HTTP_POOL_SIZE = 16
+
+# Chunks received from the network but not yet written to disk
+_MAX_PENDING_WRITES = 4
+
+# Files of at least this size are downloaded with several connections, each
+# one fetching a byte range of the file.
+_SEGMENTED_DOWNLOAD_MIN_SIZE = 256 * 1024 * 1024  # 256 MB
+_DOWNLOAD_SEGMENTS = 4
+
+# Connections a single file download may hold: one per segment, plus the
+# size and checksum requests sent to updates.oracle.com
+_CONNECTIONS_PER_DOWNLOAD = _DOWNLOAD_SEGMENTS + 1
+
+# Bytes read at a time when calculating the checksum of a file on disk
+_HASH_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MB
+
+# progress_function is called at most once per interval or amount of bytes
+# downloaded, and always when the download completes
+_PROGRESS_MIN_INTERVAL = 0.25  # seconds
+_PROGRESS_MIN_BYTES = 32 * 1024 * 1024  # 32 MB
+
+# Sidecar file keeping the checksum of a downloaded file, so it is not
+# calculated again while the file is unchanged
+_CHECKSUM_CACHE_SUFFIX = ".sha256.json"
+
+
+def create_http_session(pool_size=_HTTP_POOL_SIZE):
+    """Creates an HTTP session with connection pooling and retries
+
+    Args:
+        pool_size (int): Maximum number of kept-alive connections per host.
+            Defaults to 16.
+
+    Returns:
+        requests.Session: the session
+    """
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                backoff_factor=0.5,
+            ),
+        ),
+    )
+    return session
+
 
 class OraclePatchDownloader:
     """Class that enables downloading Oracle patches
@@ -50,7 +166,15 @@ class OraclePatchDownloader:
     Author: Lucas Pimentel Lellis
     """
 
-    def __init__(self, username, password, wanted_platforms, target_dir="."):
+    def __init__(
+        self,
+        username,
+        password,
+        wanted_platforms,
+        target_dir=".",
+        max_parallel_downloads=_MAX_PARALLEL_DOWNLOADS,
+        session=None,
+    ):
         """Creates an instance of OraclePatchDownloader
 
         Args:
@@ -60,17 +184,45 @@ class OraclePatchDownloader:
                 Oracle, that the user wants patches to be downloaded.
             target_dir (str): The target directory where patches are downloaded
                 Defaults to ".".
+            max_parallel_downloads (int): Maximum number of files downloaded
+                at the same time, shared by every download method of the
+                instance, even when they are called concurrently. Defaults
+                to 8.
+            session (requests.Session): Session used for every request to
+                Oracle Support, so connections are kept alive and reused.
+                It also holds the logon cookies. Defaults to a session
+                created by create_http_session().
         """
-        self.__cookie_jar = None
+        self.__logged_on = False
         self.__all_platforms = None
-        self.__download_links = None
         self.__db_release_components = None
         self.__all_db_patches = None
         self.__recommended_db_patches = None
+        self.__catalog_platforms = None
+        self.__platform_codes_by_name = None
+        self.__catalog_checksums = None
+        self.__checksums_by_aru = {}
         self.username = username
         self.password = password
         self.target_dir = target_dir
         self.wanted_platforms = wanted_platforms
+        self.max_parallel_downloads = max_parallel_downloads
+        self.__session = session or create_http_session(
+            max(
+                _HTTP_POOL_SIZE,
+                max_parallel_downloads * _CONNECTIONS_PER_DOWNLOAD,
+            )
+        )
+        # Held by every file being downloaded, whichever method started it
+        self.__download_slots = threading.BoundedSemaphore(
+            max_parallel_downloads
+        )
+        self.__session.headers.update(_HEADERS)
+        self.__buffer_pool = _BufferPool(
+            _CHUNK_SIZE, max_buffers=max_parallel_downloads * 2
+        )
+        self.__catalog_file_path = os.path.join(target_dir, "em_catalog.zip")
+        self.__catalog_dir_path = os.path.join(target_dir, "em_catalog")
 
     def initialize_downloader(self, download_from_file):
         """Initializes the downloader.
@@ -89,7 +241,7 @@ class OraclePatchDownloader:
             OracleSupportError: when not able to log on to Oracle Support
         """
 
-        if self.__cookie_jar is None:
+        if not self.__logged_on:
             logging.debug("Starting Oracle Support logon")
             ret = self.__logon_oracle_support()
             if not ret:
@@ -103,7 +255,7 @@ class OraclePatchDownloader:
         # Catalogue is needed to build the platform code list.
         # See if we have one from within the last 24 hours.
         try:
-            catfile = self.target_dir + os.path.sep + "em_catalog.zip"
+            catfile = self.__catalog_file_path
             logging.debug("Expected catalog location: %s", catfile)
             catfilestat = os.stat(catfile)
             if catfilestat.st_mtime < time.time() - 60 * 60 * 24:
@@ -132,24 +284,40 @@ class OraclePatchDownloader:
         """Returns a dictionary of all platforms containing a tuple for each
         line with a code and a description.
 
+        The catalog is only parsed on the first call, later calls return the
+        same dictionary until the catalog is cleaned up.
+
         Returns:
             dict: Dictionary of platforms
         """
-        aru_platforms_doc = xml.etree.ElementTree.parse(
-            self.target_dir
-            + os.path.sep
-            + "em_catalog"
-            + os.path.sep
-            + "aru_platforms.xml"
-        )
-        aru_platforms_doc_root = aru_platforms_doc.getroot()
+        if self.__catalog_platforms is not None:
+            return self.__catalog_platforms
 
-        platforms = {
+        self.__catalog_platforms = {
             tag.get("id"): tag.text.strip()
-            for tag in aru_platforms_doc_root.iterfind("./platform")
+            for tag in self.__iterparse_elements(
+                os.path.join(self.__catalog_dir_path, "aru_platforms.xml"),
+                ("platform",),
+            )
         }
 
-        return platforms
+        return self.__catalog_platforms
+
+    def platform_codes_by_name(self) -> dict:
+        """Returns a dictionary mapping every platform name to its code.
+
+        The dictionary is built once and kept until the catalog is cleaned
+        up.
+
+        Returns:
+            dict: Dictionary of platform codes keyed by platform name
+        """
+        if self.__platform_codes_by_name is None:
+            self.__platform_codes_by_name = {
+                plat_name: plat_code
+                for plat_code, plat_name in self.list_platforms().items()
+            }
+        return self.__platform_codes_by_name
 
     def download_oracle_patch(
         self,
@@ -178,44 +346,104 @@ class OraclePatchDownloader:
         Returns:
             int: Total downloaded in bytes
         """
-        if not self.__cookie_jar:
+        if not self.__logged_on:
             logging.fatal("Please call initialize_downloader() first")
             return 1
 
-        if self.__download_links:
-            self.__download_links.clear()
-
-        self.__build_list_download_links(patch_number)
+        download_links = self.__build_list_download_links(patch_number)
 
-        dest_dir = self.target_dir + os.path.sep + patch_type.value
+        dest_dir = os.path.join(self.target_dir, patch_type.value)
 
         pathlib.Path(dest_dir).mkdir(parents=True, exist_ok=True)
 
-        total_downloaded_bytes = 0
-        for dl_link in self.__download_links:
-            try:
-                oracle_checksum = self.__obtain_sha256_checksum_oracle(dl_link)
-                total_downloaded_bytes += self.__download_link(
+        # Several platforms may list the same file. Downloading it twice at
+        # the same time would corrupt it.
+        unique_download_links = {}
+        for dl_link in download_links:
+            unique_download_links.setdefault(
+                self.__extract_file_name_from_url(dl_link), dl_link
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_parallel_downloads
+        ) as checksum_executor, ThreadPoolExecutor(
+            max_workers=self.max_parallel_downloads
+        ) as executor:
+            # The checksums are small requests, so all of them are fetched
+            # ahead instead of waiting for a download slot
+            checksum_futures = {}
+            if not dry_run_mode:
+                checksum_futures = {
+                    dl_link: checksum_executor.submit(
+                        self.__obtain_sha256_checksum_oracle, dl_link
+                    )
+                    for dl_link in unique_download_links.values()
+                }
+            downloaded_bytes = executor.map(
+                lambda dl_link: self.__download_oracle_patch_link(
                     dl_link,
-                    oracle_checksum,
+                    checksum_futures.get(dl_link),
                     dest_dir,
                     progress_function,
                     dry_run_mode,
-                )
-            except ChecksumMismatch:
-                local_filename = (
-                    dest_dir
-                    + os.path.sep
-                    + self.__extract_file_name_from_url(dl_link)
-                )
-                error_str = (
-                    f"{local_filename}"
-                    " checksum does not match Oracle's checksum. "
-                    "Please remove it manually and download it again."
-                )
-                logging.error(error_str)
+                ),
+                unique_download_links.values(),
+            )
+            return sum(downloaded_bytes)
 
-        return total_downloaded_bytes
+    def __download_oracle_patch_link(
+        self,
+        dl_link,
+        checksum_future,
+        dest_dir,
+        progress_function,
+        dry_run_mode,
+    ) -> int:
+        """Downloads a file of a patch and checks it against Oracle's
+        checksum.
+
+        Args:
+            dl_link (str): the link to be downloaded
+            checksum_future (Future): the pending result of
+                __obtain_sha256_checksum_oracle for dl_link. The file is not
+                checked when it is None.
+            dest_dir (str): The directory where the file is downloaded
+            progress_function (function): a function that will be called with
+                the following parameters:
+                    - (str): file name
+                    - (int): file size in bytes
+                    - (int): total downloaded in bytes
+            dry_run_mode: Returns the amount downloaded in bytes without
+            actually downloading the files.
+
+        Returns:
+            int: Total downloaded in bytes
+        """
+        try:
+            oracle_checksum = ""
+            if checksum_future is not None:
+                oracle_checksum = checksum_future.result()
+            return self.__download_link(
+                dl_link,
+                oracle_checksum,
+                dest_dir,
+                progress_function,
+                dry_run_mode,
+            )
+        except ChecksumMismatch:
+            local_filename = os.path.join(
+                dest_dir, self.__extract_file_name_from_url(dl_link)
+            )
+            error_str = (
+                f"{local_filename}"
+                " checksum does not match Oracle's checksum. "
+                "Please remove it manually and download it again."
+            )
+            logging.error(error_str)
+            return 0
+        except requests.RequestException as excep:
+            logging.error("Could not download %s: %s", dl_link, excep)
+            return 0
 
     def download_oracle_quarter_patches(
         self,
@@ -245,124 +473,191 @@ class OraclePatchDownloader:
         Returns:
             int: Total downloaded in bytes
         """
-        dest_dir = self.target_dir + os.path.sep + patch_type.value
+        dest_dir = os.path.join(self.target_dir, patch_type.value)
+        ignored_release_regexes = [
+            re.compile(ignored_release) for ignored_release in ignored_releases
+        ]
+        ignored_description_regexes = [
+            re.compile(ignored_description_word)
+            for ignored_description_word in ignored_description_words
+        ]
+        normalized_plat_dir_names = {
+            plat_code: self.__normalize_directory_name(plat_name)
+            for plat_code, plat_name in self.__all_platforms.items()
+        }
+        all_db_patches = self.__all_db_patches
         desc_file_path_counter = collections.Counter()
         total_downloaded_bytes = 0
-        for (
-            reco_patch_comp_id,
-            reco_patch_plat,
-        ) in self.__recommended_db_patches:
-            normalized_plat_dir_name = self.__normalize_directory_name(
-                self.__all_platforms[reco_patch_plat]
-            )
-            version = self.__db_release_components[reco_patch_comp_id][
-                "version"
-            ]
-            if self.__is_expression_ignored(ignored_releases, version):
-                continue
-
-            patch_dest_path = (
-                dest_dir
-                + os.path.sep
-                + version
-                + os.path.sep
-                + normalized_plat_dir_name
-            )
-            pathlib.Path(patch_dest_path).mkdir(parents=True, exist_ok=True)
-            desc_file_path = patch_dest_path + os.path.sep + _DESC_FILE_NAME
-
-            desc_file_open_mode = "at"
-
-            with open(
-                desc_file_path, encoding="utf-8", mode=desc_file_open_mode
-            ) as desc_file:
-                for patch_uid in self.__recommended_db_patches[
-                    (reco_patch_comp_id, reco_patch_plat)
-                ]:
-                    if self.__is_expression_ignored(
-                        ignored_description_words,
-                        self.__all_db_patches[patch_uid].description,
-                    ):
-                        continue
-                    patch = self.__all_db_patches[patch_uid]
-                    if patch.access_level.upper() == "PASSWORD PROTECTED":
-                        error_str = (
-                            f'Patch "{patch.number} - {patch.description}"'
-                            " is password-protected. Download it manually"
-                            " if you need it."
-                        )
-                        logging.error(error_str)
-                        continue
+        download_futures = []
+        submitted_files = set()
+        with ThreadPoolExecutor(
+            max_workers=self.max_parallel_downloads
+        ) as executor:
+            for (
+                reco_patch_comp_id,
+                reco_patch_plat,
+            ), reco_patch_uids in self.__recommended_db_patches.items():
+                normalized_plat_dir_name = normalized_plat_dir_names[
+                    reco_patch_plat
+                ]
+                version = self.__db_release_components[reco_patch_comp_id][
+                    "version"
+                ]
+                if self.__is_expression_ignored(
+                    ignored_release_regexes, version
+                ):
+                    continue
+
+                patch_dest_path = os.path.join(
+                    dest_dir, version, normalized_plat_dir_name
+                )
+                pathlib.Path(patch_dest_path).mkdir(
+                    parents=True, exist_ok=True
+                )
+                desc_file_path = os.path.join(patch_dest_path, _DESC_FILE_NAME)
+
+                desc_file_open_mode = "at"
+                desc_lines = []
+
+                with open(
+                    desc_file_path, encoding="utf-8", mode=desc_file_open_mode
+                ) as desc_file:
+                    for patch_uid in reco_patch_uids:
+                        patch = all_db_patches[patch_uid]
+                        if self.__is_expression_ignored(
+                            ignored_description_regexes, patch.description
+                        ):
+                            continue
+                        if patch.access_level.upper() == "PASSWORD PROTECTED":
+                            error_str = (
+                                f'Patch "{patch.number} - '
+                                f'{patch.description}"'
+                                " is password-protected. Download it"
+                                " manually if you need it."
+                            )
+                            logging.error(error_str)
+                            continue
 
-                    if dry_run_mode:
-                        logging.info(patch.description)
+                        if dry_run_mode:
+                            logging.info(patch.description)
 
-                    for file in patch.files:
-                        print(
-                            f"{file.name} - {patch.description}",
-                            file=desc_file,
-                        )
-                        total_downloaded_bytes += int(file.size)
-                        try:
-                            self.__download_link(
-                                file.download_url,
-                                file.sha256sum,
-                                patch_dest_path,
-                                progress_function,
-                                dry_run_mode,
+                        for file in patch.files:
+                            desc_lines.append(
+                                f"{file.name} - {patch.description}\n"
                             )
-                        except ChecksumMismatch:
-                            error_str = (
-                                f"{file.name}"
-                                " checksum does not match Oracle's checksum. "
-                                "Please remove it manually and download it "
-                                "again."
+                            total_downloaded_bytes += int(file.size)
+
+                            # The same file may be recommended for more
+                            # than one component of a release. Downloading
+                            # it twice at the same time would corrupt it.
+                            if (patch_dest_path, file.name) in submitted_files:
+                                continue
+                            submitted_files.add((patch_dest_path, file.name))
+                            # The size is already known from the catalog
+                            if dry_run_mode:
+                                logging.info(file.name)
+                                continue
+                            download_futures.append(
+                                executor.submit(
+                                    self.__download_patch_file,
+                                    file,
+                                    patch_dest_path,
+                                    progress_function,
+                                    dry_run_mode,
+                                )
                             )
-                            logging.error(error_str)
 
-                desc_file_path_counter[desc_file_path] += 1
+                    desc_file.writelines(desc_lines)
+                    desc_file_path_counter[desc_file_path] += 1
+
+            for download_future in download_futures:
+                download_future.result()
 
-        self.__remove_duplicate_lines_desc_files()
+        self.__remove_duplicate_lines_desc_files(desc_file_path_counter)
 
         return total_downloaded_bytes
 
-    def __remove_duplicate_lines_desc_files(self):
-        """Removes duplicate lines from description.txt files."""
-        desc_file_list = pathlib.Path(self.target_dir).glob(
-            f"**/{_DESC_FILE_NAME}"
-        )
-        for desc_file in desc_file_list:
-            with open(desc_file, "r+t", encoding="utf-8") as desc_file_handler:
-                desc_lines_set = sorted(set(desc_file_handler.readlines()))
-                desc_file_handler.seek(os.SEEK_SET)
-                desc_file_handler.truncate(0)
-                desc_file_handler.writelines(desc_lines_set)
+    def __download_patch_file(
+        self, file, patch_dest_path, progress_function, dry_run_mode
+    ):
+        """Downloads a file of a recommended patch.
+
+        Args:
+            file (OraclePatchFile): the patch file to be downloaded
+            patch_dest_path (str): The directory where the file is downloaded
+            progress_function (function): a function that will be called with
+                the following parameters:
+                    - (str): file name
+                    - (int): file size in bytes
+                    - (int): total downloaded in bytes
+            dry_run_mode: Returns the amount downloaded in bytes without
+            actually downloading the files.
+        """
+        try:
+            self.__download_link(
+                file.download_url,
+                file.sha256sum,
+                patch_dest_path,
+                progress_function,
+                dry_run_mode,
+            )
+        except ChecksumMismatch:
+            error_str = (
+                f"{file.name}"
+                " checksum does not match Oracle's checksum. "
+                "Please remove it manually and download it "
+                "again."
+            )
+            logging.error(error_str)
+        except requests.RequestException as excep:
+            logging.error("Could not download %s: %s", file.name, excep)
 
     @staticmethod
-    def __is_expression_ignored(ignored_expressions, expression) -> bool:
+    def __remove_duplicate_lines_desc_files(desc_file_paths):
+        """Removes duplicate lines from description.txt files.
+
+        The lines are kept sorted. Each file is rewritten to a temporary
+        file first, which then replaces it.
+
+        Args:
+            desc_file_paths (iterable): paths of the description files
+                written during this run
+        """
+        for desc_file_path in desc_file_paths:
+            with open(desc_file_path, encoding="utf-8") as desc_file_handler:
+                desc_lines = sorted(set(desc_file_handler))
+            tmp_desc_file_path = desc_file_path + ".tmp"
+            with open(
+                tmp_desc_file_path, "wt", encoding="utf-8"
+            ) as tmp_desc_file_handler:
+                tmp_desc_file_handler.writelines(desc_lines)
+            os.replace(tmp_desc_file_path, desc_file_path)
+
+    @staticmethod
+    def __is_expression_ignored(ignored_regexes, expression) -> bool:
         """Checks if a word is on the list of ignored.
 
         Args:
-            ignored_expressions (list): List of ignored expressions.
+            ignored_regexes (list): List of compiled ignored expressions.
             expression (str): expression to be tested.
 
         Returns:
             bool: True if the expression is ignored.
         """
-        for ignored_release_regex in ignored_expressions:
-            match = re.search(ignored_release_regex, expression)
-            if match is not None:
+        for ignored_regex in ignored_regexes:
+            if ignored_regex.search(expression) is not None:
                 return True
 
         return False
 
     def cleanup_downloader_resources(self):
         """Cleans up the em_catalog files."""
-        catalog_file_path = self.target_dir + os.path.sep + "em_catalog.zip"
-        catalog_directory_path = self.target_dir + os.path.sep + "em_catalog"
+        self.__catalog_platforms = None
+        self.__platform_codes_by_name = None
+        self.__catalog_checksums = None
 
-        shutil.rmtree(catalog_directory_path, ignore_errors=True)
-        catalog_file = pathlib.Path(catalog_file_path)
+        shutil.rmtree(self.__catalog_dir_path, ignore_errors=True)
+        catalog_file = pathlib.Path(self.__catalog_file_path)
         try:
             catalog_file.unlink()
         except FileNotFoundError:
@@ -371,15 +666,24 @@ class OraclePatchDownloader:
     def __logon_oracle_support(
         self,
     ):
-        """Fills a cookie jar with logon information to Oracle Support
+        """Fills the session cookie jar with logon information to Oracle
+        Support
 
         Oracle Support login does not work with using requests.Session. It also
         does not work with allow_redirects=True, so we have to treat each
-        redirect manually while also updating the cookie_jar.
+        redirect manually while also updating the cookie_jar. Only once the
+        logon succeeds are its cookies copied into the session used by every
+        other request.
 
         Setting the headers to Wget/X.X.X is also mandatory, as it's the only
         way to authenticate without JavaScript support.
 
+        Returns:
+            int: 0 when logged on, 1 when the credentials are refused
+
+        Raises:
+            OracleSupportError: when the logon ends with an unexpected status
+                code or after _MAX_LOGON_REDIRECTS redirects
         """
 
         login_response = requests.get(
@@ -389,46 +693,39 @@ class OraclePatchDownloader:
             headers=_HEADERS,
             timeout=_REQUEST_TIMEOUT,
         )
-        self.__cookie_jar = login_response.cookies
-
-        status_code = login_response.status_code
-        while True:
-            if status_code == HTTPStatus.UNAUTHORIZED:
-                self.__cookie_jar = None
-                break
-
-            if (
-                status_code == HTTPStatus.FOUND
-                or status_code == HTTPStatus.TEMPORARY_REDIRECT
-                or status_code == HTTPStatus.MOVED_PERMANENTLY
-            ):
-                location = login_response.headers["Location"]
-                if location.startswith("/"):
-                    new_url = "https://updates.oracle.com" + location
-                else:
-                    new_url = location
-                login_response = requests.get(
-                    new_url,
-                    auth=(self.username, self.password),
-                    allow_redirects=False,
-                    headers=_HEADERS,
-                    cookies=self.__cookie_jar,
-                    timeout=_REQUEST_TIMEOUT,
-                )
-                self.__cookie_jar.update(login_response.cookies)
-                status_code = login_response.status_code
+        cookie_jar = login_response.cookies
 
-            elif status_code == HTTPStatus.OK:
-                self.__cookie_jar.update(login_response.cookies)
+        for _ in range(_MAX_LOGON_REDIRECTS):
+            if login_response.status_code not in _REDIRECT_STATUS_CODES:
                 break
-                
+            location = login_response.headers["Location"]
+            if location.startswith("/"):
+                new_url = "https://updates.oracle.com" + location
             else:
-                logging.fatal(f"Unexpected HTTP status code from login: {status_code}")
+                new_url = location
+            login_response = requests.get(
+                new_url,
+                auth=(self.username, self.password),
+                allow_redirects=False,
+                headers=_HEADERS,
+                cookies=cookie_jar,
+                timeout=_REQUEST_TIMEOUT,
+            )
+            cookie_jar.update(login_response.cookies)
 
-        if login_response.status_code == HTTPStatus.UNAUTHORIZED:
+        status_code = login_response.status_code
+        if status_code == HTTPStatus.UNAUTHORIZED:
             return 1
 
-        return 0
+        if status_code == HTTPStatus.OK:
+            self.__session.cookies.update(cookie_jar)
+            self.__logged_on = True
+            return 0
+
+        login_response.raise_for_status()
+        raise OracleSupportError(
+            f"Unexpected HTTP status code from login: {status_code}"
+        )
 
     def __build_dict_platform_codes(self):
         """Returns a dictionary of Oracle platforms codes
@@ -437,22 +734,10 @@ class OraclePatchDownloader:
         Returns:
             dict: A dictionary of platform codes and names.
         """
-        platform_codes_file_path = (
-            self.target_dir
-            + os.path.sep
-            + "em_catalog"
-            + os.path.sep
-            + "aru_platforms.xml"
-        )
-        aru_platforms_doc = xml.etree.ElementTree.parse(
-            platform_codes_file_path
-        )
-        aru_platforms_doc_root = aru_platforms_doc.getroot()
-
         self.__all_platforms = {
-            tag.get("id"): tag.text.strip()
-            for tag in aru_platforms_doc_root.iterfind("./platform")
-            if tag.text.strip() in self.wanted_platforms
+            plat_code: plat_name
+            for plat_code, plat_name in self.list_platforms().items()
+            if plat_name in self.wanted_platforms
         }
 
     def get_patch_info(self, patch_number, platform):
@@ -471,15 +756,15 @@ class OraclePatchDownloader:
         logging.debug(
             "Getting patch information for %s on %s.", patch_number, platform
         )
-        resp = requests.get(
+        resp = self.__session.get(
             "https://updates.oracle.com/Orion/Services/search",
             params={"bug": patch_number},
-            headers=_HEADERS,
-            cookies=self.__cookie_jar,
             timeout=_REQUEST_TIMEOUT,
         )
 
-        root = xml.etree.ElementTree.fromstring(resp.text)
+        root = ElementTree.fromstring(
+            resp.content, ElementTree.XMLParser(**_XML_PARSER_OPTIONS)
+        )
 
         # If required we can keep the XML in a file as follows:
         # infofile = open(f"{patch_number}.xml","w")
@@ -562,36 +847,61 @@ class OraclePatchDownloader:
                     "again."
                 )
                 logging.error(error_str)
+            except requests.RequestException as excep:
+                logging.error(
+                    "Could not download %s: %s", file_to_download["url"], excep
+                )
         return bytes_downloaded
 
     def __build_list_download_links(self, patch_number):
         """Returns a list containing download links for a given patch number
         and a list of platforms.
 
+        The platforms are searched at the same time.
+
         Returns:
             list: A list of links to be downloaded
         """
+        if not self.__all_platforms:
+            return []
 
-        self.__download_links = []
-
-        for platform in self.__all_platforms:
-            resp = requests.get(
-                "https://updates.oracle.com/Orion/SimpleSearch/process_form",
-                params={
-                    "search_type": "patch",
-                    "patch_number": patch_number,
-                    "plat_lang": platform + "P",
-                },
-                headers=_HEADERS,
-                cookies=self.__cookie_jar,
-                timeout=_REQUEST_TIMEOUT,
+        with ThreadPoolExecutor(
+            max_workers=min(
+                self.max_parallel_downloads, len(self.__all_platforms)
             )
-            resp_soup = BeautifulSoup(resp.text, _DEFAULT_HTML_PARSER)
-            links = resp_soup.find_all(
-                "a", attrs={"href": re.compile(r"\.zip")}
+        ) as executor:
+            platform_links = executor.map(
+                lambda platform: self.__fetch_platform_download_links(
+                    patch_number, platform
+                ),
+                self.__all_platforms,
             )
-            for link in links:
-                self.__download_links.append(link["href"])
+            return [link for links in platform_links for link in links]
+
+    def __fetch_platform_download_links(self, patch_number, platform):
+        """Returns a list containing download links for a given patch number
+        and platform.
+
+        Args:
+            patch_number (str): an Oracle patch number
+            platform (str): an Oracle platform code
+
+        Returns:
+            list: A list of links to be downloaded
+        """
+        resp = self.__session.get(
+            "https://updates.oracle.com/Orion/SimpleSearch/process_form",
+            params={
+                "search_type": "patch",
+                "patch_number": patch_number,
+                "plat_lang": platform + "P",
+            },
+            timeout=_REQUEST_TIMEOUT,
+        )
+        return [
+            html.unescape(href.decode("utf-8", "replace"))
+            for href in _ZIP_HREF_REGEX.findall(resp.content)
+        ]
 
     def __download_link(
         self,
@@ -607,8 +917,6 @@ class OraclePatchDownloader:
             url (str): the link to be downloaded
             oracle_file_checksum: SHA-256 checksum obtained from the download
                 source
-            cookie_jar (requests.RequestsCookieJar): a cookie jar containing
-                Oracle Support connection information
             target_dir (str): The target directory where patches are downloaded
             progress_function (function): a function that will be called with
                 the following parameters:
@@ -618,59 +926,436 @@ class OraclePatchDownloader:
             dry_run_mode: Returns the amount downloaded in bytes without
             actually downloading the files. Defaults to True.
 
+        The download waits for one of the max_parallel_downloads slots.
+
         Returns:
             int: Total downloaded in bytes
+
+        Raises:
+            ChecksumMismatch: when the checksum of the file does not match
+                oracle_file_checksum. The file on disk is only hashed when
+                the checksum is neither cached nor computed while
+                downloading it.
+        """
+        with self.__download_slots:
+            file_name = self.__extract_file_name_from_url(url)
+
+            # The size is enough to skip or resume a file, no body is
+            # requested
+            resp_head = self.__session.head(
+                url,
+                headers=_DOWNLOAD_HEADERS,
+                allow_redirects=True,
+                timeout=_REQUEST_TIMEOUT,
+            )
+            # Some servers refuse or redirect HEAD requests. The file is then
+            # downloaded with a single connection and its size is unknown.
+            head_headers = CaseInsensitiveDict()
+            if 200 <= resp_head.status_code < 300:
+                head_headers = resp_head.headers
+            else:
+                logging.debug(
+                    "HEAD request for %s answered %d, its size is unknown",
+                    file_name,
+                    resp_head.status_code,
+                )
+            file_size = int(head_headers.get("content-length") or 0)
+
+            if dry_run_mode:
+                logging.info(file_name)
+                return file_size
+
+            file_path = os.path.join(target_dir, file_name)
+            downloaded_file_checksum = None
+            checksum_is_cached = False
+            resumed = False
+            if file_size and self.__check_file_exists(file_path, file_size):
+                progress_function(file_name, file_size, file_size)
+                downloaded_file_checksum = self.__read_cached_checksum(
+                    file_path
+                )
+                checksum_is_cached = downloaded_file_checksum is not None
+            else:
+                report_progress = _ProgressReporter(
+                    progress_function, file_name, file_size
+                )
+                accepts_ranges = (
+                    head_headers.get("accept-ranges") == "bytes"
+                )
+                # Only a .part file left by an earlier download is resumed.
+                # A smaller file_path may be an older release of the file.
+                partial_size = 0
+                if accepts_ranges:
+                    partial_size = self.__get_partial_file_size(
+                        file_path + ".part", file_size
+                    )
+                segmented = (
+                    not partial_size
+                    and file_size >= _SEGMENTED_DOWNLOAD_MIN_SIZE
+                    and accepts_ranges
+                )
+                if segmented:
+                    try:
+                        self.__download_segments(
+                            url,
+                            file_path,
+                            file_size,
+                            file_name,
+                            progress_function,
+                        )
+                    except RangeNotSatisfied:
+                        logging.debug(
+                            "Range requests refused for %s, downloading it"
+                            " with a single connection",
+                            file_name,
+                        )
+                        segmented = False
+
+                if not segmented:
+                    (
+                        downloaded_file_checksum,
+                        resumed,
+                    ) = self.__download_single_stream(
+                        url,
+                        file_path,
+                        partial_size,
+                        self.__get_range_validator(head_headers),
+                        report_progress,
+                    )
+                    if not file_size:
+                        file_size = os.stat(file_path).st_size
+
+            # Files on disk are only read again when there is a checksum from
+            # Oracle to compare them with
+            if downloaded_file_checksum is None and oracle_file_checksum:
+                downloaded_file_checksum = self.__calculate_file_checksum(
+                    file_path
+                )
+
+            if (
+                resumed
+                and oracle_file_checksum
+                and oracle_file_checksum != downloaded_file_checksum
+            ):
+                logging.warning(
+                    "Resumed download of %s does not match Oracle's"
+                    " checksum, downloading it again",
+                    file_name,
+                )
+                self.__remove_downloaded_file(file_path)
+                downloaded_file_checksum, _ = self.__download_single_stream(
+                    url,
+                    file_path,
+                    0,
+                    None,
+                    _ProgressReporter(progress_function, file_name, file_size),
+                )
+
+            if (
+                oracle_file_checksum
+                and oracle_file_checksum != downloaded_file_checksum
+            ):
+                raise ChecksumMismatch
+
+            if downloaded_file_checksum is not None and not checksum_is_cached:
+                self.__write_cached_checksum(
+                    file_path, downloaded_file_checksum
+                )
+
+            return file_size
+
+    @staticmethod
+    def __get_range_validator(head_headers):
+        """Returns the value of an If-Range header for a file, so a partial
+        download is only resumed while the file on the server is unchanged.
+
+        Args:
+            head_headers (dict): headers of the response to a HEAD request
+                for the file
+
+        Returns:
+            str: the strong ETag or the Last-Modified date of the file, None
+                when the server sends neither
+        """
+        etag = head_headers.get("etag")
+        # Weak ETags are not allowed in If-Range
+        if etag and not etag.startswith("W/"):
+            return etag
+        return head_headers.get("last-modified")
+
+    @staticmethod
+    def __remove_downloaded_file(file_path):
+        """Removes a downloaded file, its partial download and its checksum
+        sidecar file.
+
+        Args:
+            file_path (str): path of the downloaded file
         """
-        file_name = self.__extract_file_name_from_url(url)
+        for path in (
+            file_path,
+            file_path + ".part",
+            file_path + _CHECKSUM_CACHE_SUFFIX,
+        ):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def __download_single_stream(
+        self, url, file_path, resume_from, range_validator, report_progress
+    ):
+        """Downloads a file with a single connection.
 
-        resp_dl = requests.get(
+        The file is downloaded to file_path.part and only renamed to
+        file_path once it is complete.
+
+        Args:
+            url (str): the link to be downloaded
+            file_path (str): path of the downloaded file
+            resume_from (int): size of file_path.part to be resumed. When 0,
+                or when the server ignores the range, the whole file is
+                downloaded again.
+            range_validator (str): ETag or Last-Modified date sent as
+                If-Range, so the server sends the whole file when it has
+                changed since the partial download. None when unknown.
+            report_progress (function): called with the size of every chunk
+                written
+
+        Returns:
+            tuple: SHA-256 checksum of the downloaded file, computed while it
+                is written, and whether an earlier partial download was
+                resumed
+        """
+        part_file_path = file_path + ".part"
+        file_mode = "wb"
+        file_hash = hashlib.sha256()
+        request_headers = _DOWNLOAD_HEADERS
+        if resume_from:
+            # Hashed before the request is sent, so the connection is not
+            # left idle while a large partial file is read
+            prefix_hash = self.__hash_file(part_file_path)
+            request_headers = {
+                **_DOWNLOAD_HEADERS,
+                "Range": f"bytes={resume_from}-",
+            }
+            if range_validator:
+                request_headers["If-Range"] = range_validator
+        resp_dl = self.__session.get(
             url,
-            cookies=self.__cookie_jar,
-            headers=_HEADERS,
+            headers=request_headers,
             stream=True,
             timeout=_REQUEST_TIMEOUT,
         )
-        file_size = resp_dl.headers.get("content-length")
+        resp_dl.raise_for_status()
+        resumed = (
+            resume_from > 0
+            and resp_dl.status_code == HTTPStatus.PARTIAL_CONTENT
+        )
+        if resumed:
+            logging.debug("Resuming %s from byte %d", file_path, resume_from)
+            file_mode = "ab"
+            file_hash = prefix_hash
+            report_progress(resume_from)
+        with resp_dl, open(part_file_path, file_mode) as dl_file:
+            self.__write_response(
+                resp_dl, dl_file, report_progress, file_hash
+            )
+        os.replace(part_file_path, file_path)
 
-        if file_size is None:
-            file_size = 0
-        else:
-            file_size = int(file_size)
+        return file_hash.hexdigest().upper(), resumed
 
-        if dry_run_mode:
-            logging.info(file_name)
-            return file_size
+    def __download_segments(
+        self, url, file_path, file_size, file_name, progress_function
+    ):
+        """Downloads a file with several connections at the same time, each
+        one fetching a byte range of the file.
 
-        if self.__check_file_exists(target_dir, file_name, file_size):
-            progress_function(file_name, file_size, file_size)
-        else:
-            total_dl = 0
-            with open(
-                target_dir + os.path.sep + file_name,
-                "wb",
-            ) as dl_file:
-                for chunk in resp_dl.iter_content(_CHUNK_SIZE):
-                    total_dl += len(chunk)
-                    dl_file.write(chunk)
-                    if file_size and progress_function:
-                        progress_function(file_name, file_size, total_dl)
-
-        downloaded_file_checksum = self.__calculate_file_checksum(
-            target_dir, file_name
-        )
+        The file is downloaded to file_path.part and only renamed to
+        file_path once every segment is complete.
 
-        if (
-            oracle_file_checksum
-            and oracle_file_checksum != downloaded_file_checksum
-        ):
-            raise ChecksumMismatch
+        Args:
+            url (str): the link to be downloaded
+            file_path (str): path of the downloaded file
+            file_size (int): Size in bytes of the file
+            file_name (str): Name of the file being downloaded
+            progress_function (function): a function that will be called with
+                the following parameters:
+                    - (str): file name
+                    - (int): file size in bytes
+                    - (int): total downloaded in bytes
 
-        return file_size
+        Raises:
+            RangeNotSatisfied: when the server does not honor a range request
+            requests.RequestException: when a segment cannot be downloaded.
+                The other segments are stopped and file_path.part is removed.
+        """
+        part_file_path = file_path + ".part"
+        download_complete = False
+        # Set when a segment fails, so the others stop instead of finishing
+        # a download that is discarded anyway
+        stop_segments = threading.Event()
+        try:
+            with open(part_file_path, "wb") as part_file:
+                part_file.truncate(file_size)
+
+            segment_size = -(-file_size // _DOWNLOAD_SEGMENTS)
+            segments = [
+                (start, min(start + segment_size, file_size) - 1)
+                for start in range(0, file_size, segment_size)
+            ]
+
+            report_progress = _ProgressReporter(
+                progress_function, file_name, file_size
+            )
+
+            with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+                segment_futures = [
+                    executor.submit(
+                        self.__download_segment,
+                        url,
+                        part_file_path,
+                        segment_start,
+                        segment_end,
+                        report_progress,
+                        stop_segments,
+                    )
+                    for segment_start, segment_end in segments
+                ]
+                try:
+                    _, running_segments = wait(
+                        segment_futures, return_when=FIRST_EXCEPTION
+                    )
+                    if running_segments:
+                        stop_segments.set()
+                    for segment_future in segment_futures:
+                        segment_future.result()
+                except BaseException:
+                    stop_segments.set()
+                    raise
+
+            os.replace(part_file_path, file_path)
+            download_complete = True
+        finally:
+            # The segments of an incomplete .part file are not tracked, so
+            # it cannot be resumed
+            if not download_complete:
+                try:
+                    os.remove(part_file_path)
+                except FileNotFoundError:
+                    pass
+
+    def __download_segment(
+        self,
+        url,
+        part_file_path,
+        segment_start,
+        segment_end,
+        report_progress,
+        stop_event,
+    ):
+        """Downloads a byte range of a file into its place in the file.
+
+        Args:
+            url (str): the link to be downloaded
+            part_file_path (str): path of the file being downloaded, already
+                extended to its final size
+            segment_start (int): offset of the first byte of the range
+            segment_end (int): offset of the last byte of the range
+            report_progress (function): called with the size of every chunk
+                written
+            stop_event (threading.Event): stops the download when set
+
+        Raises:
+            RangeNotSatisfied: when the server sends the whole file instead
+                of the range
+            requests.HTTPError: when the server answers with any other status
+        """
+        with self.__session.get(
+            url,
+            headers={
+                **_DOWNLOAD_HEADERS,
+                "Range": f"bytes={segment_start}-{segment_end}",
+            },
+            stream=True,
+            timeout=_REQUEST_TIMEOUT,
+        ) as resp_segment:
+            resp_segment.raise_for_status()
+            if resp_segment.status_code == HTTPStatus.OK:
+                raise RangeNotSatisfied
+            if resp_segment.status_code != HTTPStatus.PARTIAL_CONTENT:
+                raise requests.HTTPError(
+                    f"Unexpected HTTP status code {resp_segment.status_code}"
+                    " for a range request",
+                    response=resp_segment,
+                )
+            with open(part_file_path, "r+b") as part_file:
+                part_file.seek(segment_start)
+                self.__write_response(
+                    resp_segment, part_file, report_progress, None, stop_event
+                )
+
+    def __write_response(
+        self, resp, dl_file, report_progress, file_hash=None, stop_event=None
+    ):
+        """Writes the body of a streamed response to a file.
+
+        The body is read into pooled buffers, which are written to disk by a
+        background thread while the next chunk is received. Each buffer is
+        filled by reads of _SOCKET_READ_SIZE bytes.
+
+        Args:
+            resp (requests.Response): a streamed response
+            dl_file (file object): A file opened for binary writing
+            report_progress (function): called with the size of every chunk
+                written
+            file_hash (hashlib object, optional): updated with every chunk
+                written. Defaults to None.
+            stop_event (threading.Event, optional): the rest of the body is
+                not read once it is set. Defaults to None.
+
+        Raises:
+            requests.RequestException: when the body cannot be read, for
+                instance because the connection was dropped
+        """
+        resp.raw.decode_content = True
+        file_writer = _BackgroundFileWriter(
+            dl_file, self.__buffer_pool, file_hash=file_hash
+        )
+        try:
+            while stop_event is None or not stop_event.is_set():
+                buffer = self.__buffer_pool.acquire()
+                chunk_size = 0
+                with memoryview(buffer) as buffer_view:
+                    while chunk_size < len(buffer):
+                        read_end = chunk_size + _SOCKET_READ_SIZE
+                        read_size = resp.raw.readinto(
+                            buffer_view[chunk_size:read_end]
+                        )
+                        if not read_size:
+                            break
+                        chunk_size += read_size
+                if not chunk_size:
+                    self.__buffer_pool.release(buffer)
+                    break
+                file_writer.write(buffer, chunk_size)
+                report_progress(chunk_size)
+        # Raised as the same exceptions as Response.iter_content() does
+        except ProtocolError as excep:
+            raise requests.exceptions.ChunkedEncodingError(excep) from excep
+        except DecodeError as excep:
+            raise requests.exceptions.ContentDecodingError(excep) from excep
+        except ReadTimeoutError as excep:
+            raise requests.exceptions.ConnectionError(excep) from excep
+        finally:
+            file_writer.close()
 
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def __extract_file_name_from_url(url) -> str:
         """Extracts the file name from url.
 
+        The result is cached, as the same link is looked up several times.
+
         Args:
             url (str): the link to be downloaded
 
@@ -678,34 +1363,55 @@ class OraclePatchDownloader:
             str: the file name as defined on the URL
         """
 
-        file_name = re.sub(
-            r"https://[^.]+\.oracle\.com/([A-Za-z0-9-_]+/){0,}", "", url
-        )
-        file_name = re.sub("[?].+$", "", file_name)
+        file_name = url.partition("?")[0]
+        file_name = _URL_PREFIX_REGEX.sub("", file_name)
 
         return file_name
 
     @staticmethod
-    def __check_file_exists(target_dir, file_name, file_size) -> bool:
+    def __get_partial_file_size(file_path, file_size) -> int:
+        """Returns the size of a partial download of a file.
+
+        Args:
+            file_path (str): path of the partial download
+            file_size (int): Size in bytes of the original file.
+
+        Returns:
+            int: the size of the file on disk if it is smaller than the
+                original file, 0 otherwise.
+        """
+        try:
+            partial_size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            return 0
+        if partial_size < file_size:
+            return partial_size
+        return 0
+
+    @staticmethod
+    def __check_file_exists(file_path, file_size) -> bool:
         """Check if a file exists and has the correct size.
 
         Args:
-            target_dir (str): The target directory where patches are downloaded
-            file_name (str): Name of the file being downloaded.
+            file_path (str): path of the downloaded file
             file_size (_type_): Size in bytes of the original file.
         """
-        target_file = pathlib.Path(target_dir + os.path.sep + file_name)
-        if target_file.is_file():
-            if target_file.stat().st_size == file_size:
-                return True
-            else:
-                return False
-        else:
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
             return False
+        return stat.S_ISREG(file_stat.st_mode) and (
+            file_stat.st_size == file_size
+        )
 
     def __obtain_sha256_checksum_oracle(self, url) -> str:
         """Obtains the SHA-256 checksum from Oracle for a patch file.
 
+        The checksum listed in patch_recommendations.xml for the ARU and
+        file of the link is used when there is one. Otherwise it is
+        requested from Oracle Support once per ARU. File names alone are not
+        used, as Oracle reuses them across ARUs.
+
         Args:
             url (str): the link to be downloaded
 
@@ -713,49 +1419,187 @@ class OraclePatchDownloader:
             str: SHA-256 for the file on Oracle Support
         """
         checksum = ""
-        aru_matches = re.search("[?]aru=[0-9]+", url)
+        aru_matches = _ARU_REGEX.search(url)
         if aru_matches:
-            aru = aru_matches.group(0).split("=")[1]
-            resp_chksum = requests.get(
+            aru = aru_matches.group(1)
+            catalog_checksum = self.__get_catalog_checksums().get(
+                self.__get_checksum_key(url)
+            )
+            if catalog_checksum:
+                return catalog_checksum.upper()
+            if aru in self.__checksums_by_aru:
+                return self.__checksums_by_aru[aru]
+            resp_chksum = self.__session.get(
                 "https://updates.oracle.com/Orion/ViewDigest/get_form",
                 params={"aru": aru},
-                cookies=self.__cookie_jar,
-                headers=_HEADERS,
                 timeout=_REQUEST_TIMEOUT,
             )
+            resp_chksum.raise_for_status()
             if resp_chksum.text:
-                sha256_matches = re.search(
-                    r"\b[A-Fa-f0-9]{64}\b", resp_chksum.text
-                )
+                sha256_matches = _SHA256_REGEX.search(resp_chksum.text)
                 if sha256_matches:
-                    checksum = sha256_matches.group(0)
+                    checksum = sha256_matches.group(0).upper()
+                    self.__checksums_by_aru[aru] = checksum
 
-        return checksum.upper()
+        return checksum
+
+    def __get_catalog_checksums(self) -> dict:
+        """Returns a dictionary mapping the ARU and name of every file listed
+        in patch_recommendations.xml to its SHA-256 checksum.
+
+        An ARU may have several files, such as the parts of a large patch.
+        The dictionary is built once and kept until the catalog is cleaned
+        up.
+
+        Returns:
+            dict: Dictionary of checksums keyed by (ARU, file name)
+        """
+        if self.__catalog_checksums is None:
+            self.__catalog_checksums = {}
+            for patch in (self.__all_db_patches or {}).values():
+                for file in patch.files:
+                    checksum_key = self.__get_checksum_key(file.download_url)
+                    if checksum_key is not None:
+                        self.__catalog_checksums[checksum_key] = file.sha256sum
+        return self.__catalog_checksums
+
+    @staticmethod
+    def __get_checksum_key(url):
+        """Returns the ARU and the name of the file of a download link.
+
+        Args:
+            url (str): a download link
+
+        Returns:
+            tuple: the ARU and the patch_file parameter of the link, or the
+                file name in its path when there is no such parameter. None
+                when the link has no ARU.
+        """
+        aru_matches = _ARU_REGEX.search(url)
+        if not aru_matches:
+            return None
+        patch_file_matches = _PATCH_FILE_REGEX.search(url)
+        if patch_file_matches:
+            patch_file = patch_file_matches.group(1)
+        else:
+            patch_file = OraclePatchDownloader.__extract_file_name_from_url(
+                url
+            )
+        return aru_matches.group(1), patch_file
 
     @staticmethod
-    def __calculate_file_checksum(target_dir, file_name) -> str:
+    def __calculate_file_checksum(file_path) -> str:
         """Calculates the SHA-256 checksum of the downloaded file.
 
         Args:
-            target_dir (str): The target directory where patches are downloaded
-            file_name (str): patch file name
+            file_path (str): path of the downloaded file
 
         Returns:
             str: SHA-256 checksum of the downloaded file
         """
-        hash_chunk_size = 128 * 1024
-        with open(target_dir + os.path.sep + file_name, "rb") as checked_file:
-            file_hash = hashlib.sha256()
-            file_chunk = checked_file.read(hash_chunk_size)
-            while file_chunk:
-                file_hash.update(file_chunk)
-                file_chunk = checked_file.read(hash_chunk_size)
+        file_hash = OraclePatchDownloader.__hash_file(file_path)
 
         if file_hash:
             return file_hash.hexdigest().upper()
         else:
             return ""
 
+    @staticmethod
+    def __read_cached_checksum(file_path):
+        """Reads the checksum of a file from its sidecar file.
+
+        Args:
+            file_path (str): path of the downloaded file
+
+        Returns:
+            str: the cached SHA-256 checksum, or None when there is no cache
+                or the file has changed since it was written
+        """
+        try:
+            with open(
+                file_path + _CHECKSUM_CACHE_SUFFIX, encoding="utf-8"
+            ) as cache_file:
+                checksum_cache = json.load(cache_file)
+            file_stat = os.stat(file_path)
+            if (
+                checksum_cache["size"] == file_stat.st_size
+                and checksum_cache["mtime_ns"] == file_stat.st_mtime_ns
+            ):
+                return checksum_cache["sha256"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    @staticmethod
+    def __write_cached_checksum(file_path, checksum):
+        """Writes the checksum of a file to its sidecar file.
+
+        Args:
+            file_path (str): path of the downloaded file
+            checksum (str): SHA-256 checksum of the file
+        """
+        try:
+            file_stat = os.stat(file_path)
+            with open(
+                file_path + _CHECKSUM_CACHE_SUFFIX, "w", encoding="utf-8"
+            ) as cache_file:
+                json.dump(
+                    {
+                        "size": file_stat.st_size,
+                        "mtime_ns": file_stat.st_mtime_ns,
+                        "sha256": checksum,
+                    },
+                    cache_file,
+                )
+        except OSError as excep:
+            logging.debug(
+                "Could not cache the checksum of %s: %s", file_path, excep
+            )
+
+    @staticmethod
+    def __hash_file(file_path):
+        """Reads a file through a SHA-256 hash object.
+
+        Args:
+            file_path (str): path of the file
+
+        Returns:
+            hashlib object: SHA-256 hash object updated with the file contents
+        """
+        hash_buffer = bytearray(_HASH_CHUNK_SIZE)
+        with open(file_path, "rb") as checked_file, memoryview(
+            hash_buffer
+        ) as hash_view:
+            if hasattr(os, "posix_fadvise"):
+                # Lets the kernel read ahead while the chunks are hashed
+                os.posix_fadvise(
+                    checked_file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL
+                )
+            file_hash = hashlib.sha256()
+            read_size = checked_file.readinto(hash_buffer)
+            while read_size:
+                file_hash.update(hash_view[:read_size])
+                read_size = checked_file.readinto(hash_buffer)
+            OraclePatchDownloader.__drop_page_cache(checked_file)
+
+        return file_hash
+
+    @staticmethod
+    def __drop_page_cache(file):
+        """Tells the kernel that the cached pages of a file will not be used
+        again, so multi-GB patch files do not push everything else out of
+        the page cache.
+
+        Dirty pages are not dropped, so it is only worth calling on a file
+        that has been read, not on one that has just been written.
+
+        Args:
+            file (file object): A file opened in binary mode
+        """
+        if hasattr(os, "posix_fadvise"):
+            file.flush()
+            os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
     def __download_em_catalog(self):
         """Downloads em_catalog.zip from Oracle Support.
 
@@ -763,29 +1607,31 @@ class OraclePatchDownloader:
         platform codes.
 
         The zipped file will be extracted to a subdirectory of target_dir named
-        em_catalog.
+        em_catalog. A freshly downloaded file is extracted from memory, and
+        only saved to target_dir to mark when the catalog was downloaded.
 
         """
         print("***** CALLING __download_em_catalog")
 
         total_downloaded_bytes = 0
-        local_file_path = self.target_dir + os.path.sep + "em_catalog.zip"
-        local_directory_path = self.target_dir + os.path.sep + "em_catalog"
+        local_file_path = self.__catalog_file_path
+        local_directory_path = self.__catalog_dir_path
 
+        catalog_zip = local_file_path
         if not pathlib.Path(local_file_path).is_file():
-            total_downloaded_bytes += self.__download_link(
+            resp_catalog = self.__session.get(
                 "https://updates.oracle.com/download/em_catalog.zip",
-                None,
-                self.target_dir,
-                None,
-                dry_run_mode=False,
+                timeout=_REQUEST_TIMEOUT,
             )
+            resp_catalog.raise_for_status()
+            with open(local_file_path, "wb") as catalog_file:
+                catalog_file.write(resp_catalog.content)
+            total_downloaded_bytes += len(resp_catalog.content)
+            catalog_zip = io.BytesIO(resp_catalog.content)
 
-        pathlib.Path(self.target_dir + os.path.sep + "em_catalog").mkdir(
-            parents=True, exist_ok=True
-        )
+        pathlib.Path(local_directory_path).mkdir(parents=True, exist_ok=True)
         logging.debug("Extract em_catalog.zip - Beginning")
-        with zipfile.ZipFile(local_file_path, "r") as cat_zip_file:
+        with zipfile.ZipFile(catalog_zip, "r") as cat_zip_file:
             cat_zip_file.extractall(local_directory_path)
         logging.debug("Extract em_catalog.zip - Ended")
         return total_downloaded_bytes
@@ -804,21 +1650,25 @@ class OraclePatchDownloader:
             }
 
         """
-        components_file_path = (
-            self.target_dir
-            + os.path.sep
-            + "em_catalog"
-            + os.path.sep
-            + "components.xml"
+        components_file_path = os.path.join(
+            self.__catalog_dir_path, "components.xml"
         )
-        components_doc = xml.etree.ElementTree.parse(components_file_path)
-
-        components_root = components_doc.getroot()
-
         self.__db_release_components = {}
-        for component in components_root.iterfind(
-            "./components/ctype[@name='RELEASE']/component"
+        for ctype in self.__iterparse_elements(
+            components_file_path, ("components", "ctype")
         ):
+            if ctype.get("name") == "RELEASE":
+                self.__add_database_release_components(ctype)
+
+    def __add_database_release_components(self, ctype):
+        """Adds the database release components of a "ctype" tag of the
+        em_catalog/components.xml file to the dict of database release
+        components.
+
+        Args:
+            ctype (ElementTag): an ElementTag with tag == ctype.
+        """
+        for component in ctype.iterfind("./component"):
             component_name = component.find("name").text
             if component_name in [
                 "Oracle Database",
@@ -828,7 +1678,7 @@ class OraclePatchDownloader:
                 lifecycle_tag = component.find("lifecycle")
                 eol_extended = None
                 eol_premium = None
-                if lifecycle_tag:
+                if lifecycle_tag is not None:
                     eol_extended_tag = lifecycle_tag.find(
                         "./date[@type='eol_extended']"
                     )
@@ -854,31 +1704,46 @@ class OraclePatchDownloader:
 
     def __process_patch_recommendations_file(self):
         """Processes the patch_recommendations.xml file."""
-        recommendations_file_path = (
-            self.target_dir
-            + os.path.sep
-            + "em_catalog"
-            + os.path.sep
-            + "patch_recommendations.xml"
+        recommendations_file_path = os.path.join(
+            self.__catalog_dir_path, "patch_recommendations.xml"
         )
         path_counter = collections.Counter()
 
         self.__all_db_patches = {}
+        self.__catalog_checksums = None
 
         # format - {(cid, platform): {patch_1, patch_2, ..., patch_n},}
-        self.__recommended_db_patches = {}
-        for evt, elem in xml.etree.ElementTree.iterparse(
-            recommendations_file_path, events=("start", "end")
-        ):
-            self.__process_patches_tag(path_counter, evt, elem)
-
-            self.__process_standalone_recommendations_tag(
-                path_counter, self.__recommended_db_patches, evt, elem
-            )
+        self.__recommended_db_patches = collections.defaultdict(set)
 
-            self.__process_components_recommendations_tag(
-                path_counter, self.__recommended_db_patches, evt, elem
-            )
+        process_recommendations_tag = functools.partial(
+            self.__process_recommendations_tag,
+            recommended_patches=self.__recommended_db_patches,
+        )
+        # Only the tags below are processed, every other tag is skipped with
+        # a single lookup
+        tag_handlers = {
+            "patches": self.__process_patches_tag,
+            "fixed_bugs": self.__process_patches_tag,
+            "patch": self.__process_patches_tag,
+            "release": process_recommendations_tag,
+        }
+        for section_name in _RECOMMENDATIONS_SECTIONS:
+            tag_handlers[section_name] = process_recommendations_tag
+
+        # lxml can skip the other tags before they reach Python
+        iterparse_filter = {}
+        if _USING_LXML:
+            iterparse_filter["tag"] = list(tag_handlers)
+
+        for evt, elem in ElementTree.iterparse(
+            recommendations_file_path,
+            events=("start", "end"),
+            **iterparse_filter,
+            **_XML_PARSER_OPTIONS,
+        ):
+            tag_handler = tag_handlers.get(elem.tag)
+            if tag_handler is not None:
+                tag_handler(path_counter, evt, elem)
 
     def __process_patches_tag(self, path_counter, evt, elem):
         """Processes the "patches" tags for the patch_recommendations.xml file.
@@ -894,11 +1759,7 @@ class OraclePatchDownloader:
         if evt == "start" and elem.tag == "fixed_bugs":
             elem.clear()
 
-        if (
-            evt == "end"
-            and path_counter["patches"] > 0
-            and elem.tag == "patch"
-        ):
+        if evt == "end" and elem.tag == "patch" and path_counter["patches"]:
             access_level_tag = elem.find("access")
             if access_level_tag is not None:
                 access_level = access_level_tag.text
@@ -929,99 +1790,98 @@ class OraclePatchDownloader:
                     files=patch_files,
                 )
 
-            elem.clear()
+            self.__clear_element(elem)
 
         if evt == "end" and elem.tag == "patches":
             path_counter["patches"] -= 1
             elem.clear()
 
-    def __process_standalone_recommendations_tag(
-        self, path_counter, recommended_patches, evt, elem
+    def __process_recommendations_tag(
+        self, path_counter, evt, elem, recommended_patches
     ):
-        """Processes the "standalone_recommendations" tags for the
-        patch_recommendations.xml file.
+        """Processes the "standalone_recommendations" and
+        "components_recommendations" tags for the patch_recommendations.xml
+        file.
 
         Args:
             path_counter (Counter): a counter collection to keep track of the
             parent section.
-            recommended_patches (set): an existing set of recommended patches
-            that will receive the recommendations for the standalone section.
             evt (str): which event is being processed at the moment.
             elem (ElementTag): an ElementTag with tag == patch.
+            recommended_patches (defaultdict): sets of recommended patches by
+            (cid, platform) that will receive the recommendations for both
+            sections.
         """
-        if evt == "start" and elem.tag == "standalone_recommendations":
-            path_counter["standalone_recommendations"] += 1
-
-        if (
-            evt == "end"
-            and path_counter["standalone_recommendations"] > 0
-            and elem.tag == "release"
-        ):
-            if elem.get("cid") in self.__db_release_components:
-                component_id = elem.get("cid")
+        if elem.tag in _RECOMMENDATIONS_SECTIONS:
+            # Both sections are handled alike, a single count is enough
+            if evt == "start":
+                path_counter["recommendations"] += 1
+            else:
+                path_counter["recommendations"] -= 1
+                elem.clear()
+            return
+
+        if evt == "end" and path_counter["recommendations"]:
+            component_id = elem.get("cid")
+            if component_id in self.__db_release_components:
+                all_platforms = self.__all_platforms
                 for platform in elem:
                     platform_id = platform.get("id")
-                    if platform_id in self.__all_platforms:
-                        if (
-                            component_id,
-                            platform_id,
-                        ) not in recommended_patches:
-                            recommended_patches[
-                                (component_id, platform_id)
-                            ] = set()
+                    if platform_id in all_platforms:
+                        platform_patches = recommended_patches[
+                            (component_id, platform_id)
+                        ]
                         for patch in platform:
-                            recommended_patches[
-                                (component_id, platform_id)
-                            ].add(patch.get("uid"))
-            elem.clear()
+                            platform_patches.add(patch.get("uid"))
+            self.__clear_element(elem)
 
-        if evt == "end" and elem.tag == "standalone_recommendations":
-            path_counter["standalone_recommendations"] -= 1
-            elem.clear()
+    @staticmethod
+    def __iterparse_elements(xml_file_path, path):
+        """Parses an XML file incrementally, yielding the elements found at
+        a path below the root element.
 
-    def __process_components_recommendations_tag(
-        self, path_counter, recommended_patches, evt, elem
-    ):
-        """Processes the "components_recommendations" tags for the
-        patch_recommendations.xml file.
+        Each element is cleared once it has been processed, so the whole
+        document is never kept in memory.
 
         Args:
-            path_counter (Counter): a counter collection to keep track of the
-            parent section.
-            recommended_patches (set): an existing set of recommended patches
-            that will receive the recommendations for the standalone section.
-            evt (str): which event is being processed at the moment.
-            elem (ElementTag): an ElementTag with tag == patch.
-        """
-        if evt == "start" and elem.tag == "components_recommendations":
-            path_counter["components_recommendations"] += 1
+            xml_file_path (str): path of the XML file
+            path (tuple): tags from a child of the root element down to the
+                wanted elements
 
-        if (
-            evt == "end"
-            and path_counter["components_recommendations"] > 0
-            and elem.tag == "release"
+        Yields:
+            ElementTag: every element found at path
+        """
+        current_path = []
+        open_elements = []
+        for evt, elem in ElementTree.iterparse(
+            xml_file_path, events=("start", "end"), **_XML_PARSER_OPTIONS
         ):
-            if elem.get("cid") in self.__db_release_components:
-                component_id = elem.get("cid")
-                for platform in elem:
-                    platform_id = platform.get("id")
-                    if platform_id in self.__all_platforms:
-                        if (
-                            component_id,
-                            platform_id,
-                        ) not in recommended_patches:
-                            recommended_patches[
-                                (component_id, platform_id)
-                            ] = set()
-                        for patch in platform:
-                            recommended_patches[
-                                (component_id, platform_id)
-                            ].add(patch.get("uid"))
-            elem.clear()
+            if evt == "start":
+                current_path.append(elem.tag)
+                open_elements.append(elem)
+                continue
+            current_path.pop()
+            open_elements.pop()
+            if tuple(current_path[1:]) + (elem.tag,) == path:
+                yield elem
+                OraclePatchDownloader.__clear_element(elem)
+                # ElementTree elements do not know their parent, so the
+                # processed siblings are removed from it here
+                if not _USING_LXML:
+                    del open_elements[-1][:]
 
-        if evt == "end" and elem.tag == "components_recommendations":
-            path_counter["components_recommendations"] -= 1
-            elem.clear()
+    @staticmethod
+    def __clear_element(elem):
+        """Frees an element that has already been processed.
+
+        Args:
+            elem (ElementTag): the element to be cleared.
+        """
+        elem.clear()
+        # lxml also keeps the cleared siblings in the parent
+        if _USING_LXML:
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
 
     @staticmethod
     def __normalize_directory_name(orig_name) -> str:
@@ -1034,9 +1894,11 @@ class OraclePatchDownloader:
         Returns:
             str: the normalized name.
         """
-        normalized_name = re.sub("[^a-zA-Z0-9_.-]+", "_", orig_name)
-        normalized_name = re.sub("_$", "", normalized_name)
-        normalized_name = re.sub("^_", "", normalized_name)
+        normalized_name = _DIRECTORY_NAME_REGEX.sub("_", orig_name)
+        if normalized_name.endswith("_"):
+            normalized_name = normalized_name[:-1]
+        if normalized_name.startswith("_"):
+            normalized_name = normalized_name[1:]
 
         return normalized_name
 
@@ -1044,6 +1906,16 @@ class OraclePatchDownloader:
 class OraclePatch:
     """Structure grouping attributes of an Oracle Patch."""
 
+    __slots__ = (
+        "uid",
+        "number",
+        "platform_code",
+        "release_name",
+        "description",
+        "access_level",
+        "files",
+    )
+
     def __init__(
         self,
         uid,
@@ -1063,7 +1935,7 @@ class OraclePatch:
         self.files = files
 
     def __str__(self):
-        return str(self.__dict__)
+        return str({slot: getattr(self, slot) for slot in self.__slots__})
 
     def __repr__(self):
         repr_str = (
@@ -1073,16 +1945,26 @@ class OraclePatch:
         )
         return repr_str
 
+    # Patches are identified by uid alone, so equal patches hash alike
     def __eq__(self, other):
+        if not isinstance(other, OraclePatch):
+            return NotImplemented
         return self.uid == other.uid
 
+    def __hash__(self):
+        return hash(self.uid)
+
     def __lt__(self, other):
+        if not isinstance(other, OraclePatch):
+            return NotImplemented
         return self.uid < other.uid
 
 
 class OraclePatchFile:
     """Structure grouping attributes of an Oracle Patch file."""
 
+    __slots__ = ("download_url", "sha256sum", "name", "size")
+
     def __init__(self, download_url, sha256sum, name, size):
         self.download_url = download_url
         self.sha256sum = sha256sum
@@ -1090,7 +1972,7 @@ class OraclePatchFile:
         self.size = size
 
     def __str__(self):
-        return str(self.__dict__)
+        return str({slot: getattr(self, slot) for slot in self.__slots__})
 
     def __repr__(self):
         repr_str = (
@@ -1100,6 +1982,185 @@ class OraclePatchFile:
         return repr_str
 
 
+class _ProgressReporter:
+    """Accumulates the bytes downloaded for a file and passes the total to
+    a progress function, at most every _PROGRESS_MIN_INTERVAL seconds or
+    _PROGRESS_MIN_BYTES bytes.
+
+    It may be called from several threads at the same time.
+    """
+
+    def __init__(self, progress_function, file_name, file_size):
+        """Creates an instance of _ProgressReporter
+
+        Args:
+            progress_function (function): a function that will be called with
+                the following parameters:
+                    - (str): file name
+                    - (int): file size in bytes
+                    - (int): total downloaded in bytes
+            file_name (str): Name of the file being downloaded
+            file_size (int): Size in bytes of the file. Progress is not
+                reported when it is unknown.
+        """
+        self.__progress_function = progress_function
+        self.__file_name = file_name
+        self.__file_size = file_size
+        self.__total_dl = 0
+        self.__last_emit_bytes = 0
+        self.__last_emit_time = 0.0
+        self.__lock = threading.Lock()
+
+    def __call__(self, chunk_size):
+        """Adds a chunk to the total downloaded.
+
+        Args:
+            chunk_size (int): number of bytes downloaded
+        """
+        with self.__lock:
+            self.__total_dl += chunk_size
+            if not (self.__progress_function and self.__file_size):
+                return
+            now = time.monotonic()
+            if (
+                self.__total_dl < self.__file_size
+                and now - self.__last_emit_time < _PROGRESS_MIN_INTERVAL
+                and self.__total_dl - self.__last_emit_bytes
+                < _PROGRESS_MIN_BYTES
+            ):
+                return
+            self.__last_emit_time = now
+            self.__last_emit_bytes = self.__total_dl
+            self.__progress_function(
+                self.__file_name, self.__file_size, self.__total_dl
+            )
+
+
+class _BufferPool:
+    """Pool of reusable download buffers.
+
+    Buffers are handed out to the downloads in progress and returned once
+    their content is written to disk, so the download loop does not
+    allocate a new chunk for every read.
+    """
+
+    def __init__(self, buffer_size, max_buffers):
+        """Creates an instance of _BufferPool
+
+        Args:
+            buffer_size (int): Size in bytes of each buffer
+            max_buffers (int): Maximum number of idle buffers kept in the
+                pool. Buffers released when the pool is full are discarded.
+        """
+        self.__buffer_size = buffer_size
+        self.__idle_buffers = queue.LifoQueue(maxsize=max_buffers)
+
+    def acquire(self) -> bytearray:
+        """Returns an idle buffer, allocating a new one if none is left.
+
+        Returns:
+            bytearray: a buffer of buffer_size bytes
+        """
+        try:
+            return self.__idle_buffers.get_nowait()
+        except queue.Empty:
+            return bytearray(self.__buffer_size)
+
+    def release(self, buffer):
+        """Returns a buffer to the pool.
+
+        Args:
+            buffer (bytearray): a buffer obtained from acquire()
+        """
+        try:
+            self.__idle_buffers.put_nowait(buffer)
+        except queue.Full:
+            pass
+
+
+class _BackgroundFileWriter:
+    """Writes chunks to a file from a separate thread.
+
+    The thread that receives the chunks from the network can carry on with
+    the next read while the previous chunk is being written to disk.
+    """
+
+    def __init__(
+        self,
+        file,
+        buffer_pool,
+        max_pending_writes=_MAX_PENDING_WRITES,
+        file_hash=None,
+    ):
+        """Creates an instance of _BackgroundFileWriter and starts its thread
+
+        Args:
+            file (file object): A file opened for binary writing
+            buffer_pool (_BufferPool): The pool the written buffers are
+                released to
+            max_pending_writes (int): Maximum number of chunks waiting to be
+                written. write() blocks when the limit is reached.
+            file_hash (hashlib object, optional): updated with every chunk
+                written. Defaults to None.
+        """
+        self.__file = file
+        self.__file_hash = file_hash
+        self.__buffer_pool = buffer_pool
+        self.__pending_writes = queue.Queue(maxsize=max_pending_writes)
+        self.__error = None
+        self.__thread = threading.Thread(
+            target=self.__write_chunks, daemon=True
+        )
+        self.__thread.start()
+
+    def write(self, buffer, size):
+        """Queues the first bytes of a buffer to be written.
+
+        The buffer is released to the pool once it is written.
+
+        Args:
+            buffer (bytearray): a buffer obtained from the pool
+            size (int): number of bytes of the buffer to be written
+
+        Raises:
+            OSError: when a previous write has failed
+        """
+        if self.__error is not None:
+            self.__buffer_pool.release(buffer)
+            raise self.__error
+        self.__pending_writes.put((buffer, size))
+
+    def close(self):
+        """Waits until every queued chunk is written.
+
+        The file itself is not closed.
+
+        Raises:
+            OSError: when a write has failed
+        """
+        self.__pending_writes.put(None)
+        self.__thread.join()
+        if self.__error is not None:
+            raise self.__error
+
+    def __write_chunks(self):
+        """Writes the queued chunks until close() is called."""
+        while True:
+            pending_write = self.__pending_writes.get()
+            if pending_write is None:
+                break
+            buffer, size = pending_write
+            if self.__error is None:
+                try:
+                    with memoryview(buffer) as buffer_view:
+                        self.__file.write(buffer_view[:size])
+                        if self.__file_hash is not None:
+                            self.__file_hash.update(buffer_view[:size])
+                except OSError as excep:
+                    self.__error = excep
+            self.__buffer_pool.release(buffer)
+
+
 class OraclePatchType(Enum):
     """Enum to list possible types of patches supported by the module.
 
@@ -1115,5 +2176,9 @@ class ChecksumMismatch(Exception):
     """Raised when the downloaded file checksum does not match Oracle's."""
 
 
+class RangeNotSatisfied(Exception):
+    """Raised when the server does not honor an HTTP range request."""
+
+
 class OracleSupportError(Exception):
     """Raised when not able to log on to Oracle Support."""
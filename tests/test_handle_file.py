@@ -0,0 +1,50 @@
+"""Tests for handle_file in oracle_quarter_patch_downloader."""
+
+import io
+import threading
+import unittest
+
+import oracle_quarter_patch_downloader
+
+
+class _FakePatchDownloader:
+    """Records the downloads requested by handle_file."""
+
+    def __init__(self):
+        self.downloads = []
+        self.__lock = threading.Lock()
+
+    def platform_codes_by_name(self):
+        # Like OraclePatchDownloader, the codes are strings
+        return {"Linux x86-64": "226"}
+
+    def download_patch_files(
+        self, patch_number, platform, subdir, progress_function, dry_run_mode
+    ):
+        with self.__lock:
+            self.downloads.append((patch_number, platform, subdir))
+        return 1
+
+
+class HandleFileTest(unittest.TestCase):
+    def test_repeated_line_with_numeric_and_named_platform(self):
+        patch_list = io.StringIO(
+            "123,19.0,OPatch,opatch,226\n"
+            "123,19.0,OPatch,opatch,Linux x86-64\n"
+            "123,19.0,OPatch,other,Linux x86-64\n"
+        )
+        patch_dler = _FakePatchDownloader()
+
+        downloaded = oracle_quarter_patch_downloader.handle_file(
+            patch_list, patch_dler, dry_run_mode=False, max_workers=4
+        )
+
+        self.assertEqual(downloaded, 2)
+        self.assertCountEqual(
+            patch_dler.downloads,
+            [("123", "226", "opatch"), ("123", "226", "other")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+"""Tests for oraclepatchdownloader."""
+
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from oraclepatchdownloader import (
+    OraclePatch,
+    OraclePatchDownloader,
+    OraclePatchFile,
+)
+
+_FILE_SIZE = 1000
+
+
+class _TruncatedBodyHandler(BaseHTTPRequestHandler):
+    """Announces _FILE_SIZE bytes but drops the connection halfway."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(_FILE_SIZE))
+        self.end_headers()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(_FILE_SIZE))
+        self.end_headers()
+        self.wfile.write(b"x" * (_FILE_SIZE // 2))
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class _ForbiddenRangeHandler(BaseHTTPRequestHandler):
+    """Accepts ranges in HEAD responses but refuses range requests."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(_FILE_SIZE))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+    def do_GET(self):
+        status = 403 if self.headers.get("Range") else 200
+        body = b"" if status == 403 else b"x" * _FILE_SIZE
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self):
+        self.target_dir = tempfile.mkdtemp()
+        # Links are expected on oracle.com, the local one is used as is
+        patcher = mock.patch.object(
+            OraclePatchDownloader,
+            "_OraclePatchDownloader__extract_file_name_from_url",
+            staticmethod(lambda url: url.rsplit("/", 1)[-1]),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start_server(self, handler_class):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_port}/p123_Linux.zip"
+
+    def test_truncated_body_is_logged_and_skipped(self):
+        url = self.start_server(_TruncatedBodyHandler)
+        patch_dler = OraclePatchDownloader(
+            "user", "password", [], target_dir=self.target_dir
+        )
+        download_link = (
+            patch_dler._OraclePatchDownloader__download_oracle_patch_link
+        )
+
+        with self.assertLogs(level="ERROR") as logs:
+            downloaded = download_link(url, None, self.target_dir, None, False)
+
+        self.assertEqual(downloaded, 0)
+        self.assertIn("Could not download", logs.output[0])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.target_dir, "p123_Linux.zip"))
+        )
+
+    @mock.patch("oraclepatchdownloader._SEGMENTED_DOWNLOAD_MIN_SIZE", 100)
+    def test_refused_segment_is_not_downloaded_again(self):
+        url = self.start_server(_ForbiddenRangeHandler)
+        patch_dler = OraclePatchDownloader(
+            "user", "password", [], target_dir=self.target_dir
+        )
+        download_link = (
+            patch_dler._OraclePatchDownloader__download_oracle_patch_link
+        )
+
+        with self.assertLogs(level="ERROR") as logs:
+            downloaded = download_link(url, None, self.target_dir, None, False)
+
+        # A 403 is an error, only a 200 means ranges are not supported
+        self.assertEqual(downloaded, 0)
+        self.assertIn("403", logs.output[0])
+        self.assertEqual(os.listdir(self.target_dir), [])
+
+
+class ChecksumTest(unittest.TestCase):
+    def test_catalog_checksums_of_files_sharing_an_aru(self):
+        session = mock.MagicMock()
+        patch_dler = OraclePatchDownloader(
+            "user", "password", [], session=session
+        )
+        file_names = ("p1_190000_Linux_1of2.zip", "p1_190000_Linux_2of2.zip")
+        links = {
+            name: "https://updates.oracle.com/Orion/Services/download/"
+            f"{name}?aru=123&patch_file={name}"
+            for name in file_names
+        }
+        patch_dler._OraclePatchDownloader__all_db_patches = {
+            "1": OraclePatch(
+                uid="1",
+                number="1",
+                platform_code="226",
+                release_name="19.0.0.0.0",
+                description="Multi-part patch",
+                access_level="Open to all",
+                files=[
+                    OraclePatchFile(
+                        links[name],
+                        sha256sum=digit * 64,
+                        name=name,
+                        size="1",
+                    )
+                    for name, digit in zip(file_names, "ab")
+                ],
+            )
+        }
+        obtain_checksum = (
+            patch_dler._OraclePatchDownloader__obtain_sha256_checksum_oracle
+        )
+
+        self.assertEqual(obtain_checksum(links[file_names[0]]), "A" * 64)
+        self.assertEqual(obtain_checksum(links[file_names[1]]), "B" * 64)
+        session.get.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()